@@ -13,13 +13,21 @@ repository but keeps everything self-contained inside this codebase.
 from __future__ import annotations
 
 import argparse
+import hashlib
+import http.client
 import json
+import os
 import subprocess
 import sys
 import time
 from pathlib import Path
-from typing import Any, Dict
-from urllib import error, parse, request
+from typing import Any, Dict, Optional, Tuple
+from urllib import parse, request
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional accelerator
+    orjson = None
 
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -40,6 +48,12 @@ DEFAULT_RATE = 300
 DEFAULT_THREADS = 2
 DEFAULT_CONNECTIONS = 32
 DEFAULT_OUTPUT = REPO_ROOT / "ms_collecter" / "deps.json"
+DEFAULT_CACHE_DIR = REPO_ROOT / ".cache" / "jaeger_deps"
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.5  # seconds, doubled after every failed attempt
+
+# Keep-alive connections to the Jaeger query service, keyed by (scheme, host).
+_CONNECTIONS: Dict[Tuple[str, str], http.client.HTTPConnection] = {}
 
 
 class DependencyCollectionError(RuntimeError):
@@ -69,16 +83,99 @@ def run_wrk(
         url,
     ]
 
+    # wrk's report goes to stderr so that stdout only carries our own
+    # progress lines; stdout is flushed first to keep the two in order.
+    sys.stdout.flush()
     try:
-        subprocess.run(cmd, check=True)
+        proc = subprocess.Popen(cmd, stdout=sys.stderr, stderr=subprocess.STDOUT)
     except FileNotFoundError as exc:
         raise DependencyCollectionError(
             f"wrk binary not found at '{wrk_bin}'. Build wrk2 or set --wrk-bin"
         ) from exc
-    except subprocess.CalledProcessError as exc:
+
+    try:
+        returncode = proc.wait()
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    if returncode != 0:
         raise DependencyCollectionError(
             "wrk execution failed. See the output above for details."
-        ) from exc
+        )
+
+
+def _get_connection(scheme: str, netloc: str, timeout: float) -> http.client.HTTPConnection:
+    conn = _CONNECTIONS.get((scheme, netloc))
+    if conn is None:
+        conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = conn_cls(netloc, timeout=timeout)
+        _CONNECTIONS[(scheme, netloc)] = conn
+    else:
+        conn.timeout = timeout
+        if conn.sock is not None:
+            # An open socket keeps the timeout it was created with.
+            conn.sock.settimeout(timeout)
+    return conn
+
+
+def _reject_proxy(scheme: str, host: str) -> None:
+    """Refuse URLs that urllib would have routed through a proxy.
+
+    Requests go over raw ``http.client`` connections, which ignore
+    ``HTTP(S)_PROXY``; failing loudly beats silently bypassing the proxy.
+    """
+
+    if scheme in request.getproxies() and not request.proxy_bypass(host):
+        raise DependencyCollectionError(
+            f"An {scheme.upper()} proxy is configured but not supported for Jaeger "
+            f"requests; add '{host}' to NO_PROXY or unset the proxy variables"
+        )
+
+
+def _http_get(
+    url: str,
+    *,
+    timeout: float,
+    headers: Optional[Dict[str, str]] = None,
+) -> Tuple[int, http.client.HTTPMessage, bytes]:
+    """GET ``url`` over a pooled keep-alive connection, retrying transient errors.
+
+    The body is returned as raw bytes; JSON is UTF-8 by specification so the
+    callers parse it without decoding to ``str`` first.
+    """
+
+    parts = parse.urlsplit(url)
+    _reject_proxy(parts.scheme, parts.hostname or "")
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+
+    for attempt in range(HTTP_RETRIES + 1):
+        conn = _get_connection(parts.scheme, parts.netloc, timeout)
+        try:
+            conn.request("GET", target, headers=headers or {})
+            resp = conn.getresponse()
+            return resp.status, resp.headers, resp.read()
+        except (http.client.HTTPException, OSError):
+            # A stale keep-alive socket surfaces here as well; reconnect.
+            conn.close()
+            if attempt == HTTP_RETRIES:
+                raise
+            time.sleep(HTTP_BACKOFF * 2**attempt)
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+def _cache_paths(cache_dir: Path, jaeger_base: str, lookback_ms: int) -> Tuple[Path, Path]:
+    key = hashlib.sha1(f"{jaeger_base.rstrip('/')}|{lookback_ms}".encode()).hexdigest()
+    return cache_dir / f"{key}.json", cache_dir / f"{key}.etag"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
 
 
 def fetch_dependencies(
@@ -86,37 +183,71 @@ def fetch_dependencies(
     jaeger_base: str,
     lookback_ms: int,
     timeout: int,
+    cache_dir: Optional[Path] = None,
 ) -> Dict[str, Any]:
-    """Retrieve the dependency graph from Jaeger."""
+    """Retrieve the dependency graph from Jaeger.
+
+    When ``cache_dir`` is given, responses carrying an ETag are stored there
+    per (Jaeger URL, lookback) and revalidated with ``If-None-Match`` on the
+    next call, so an unchanged graph is answered with ``304 Not Modified``
+    and read back from disk.
+    """
 
     end_ts = int(time.time() * 1000)
     query = parse.urlencode({"endTs": end_ts, "lookback": lookback_ms})
     url = f"{jaeger_base.rstrip('/')}/api/dependencies?{query}"
 
+    headers = {"Accept": "application/json"}
+    body_path = etag_path = None
+    if cache_dir is not None:
+        body_path, etag_path = _cache_paths(cache_dir, jaeger_base, lookback_ms)
+        if body_path.is_file() and etag_path.is_file():
+            headers["If-None-Match"] = etag_path.read_text().strip()
+
     try:
-        with request.urlopen(url, timeout=timeout) as resp:
-            if resp.status != 200:
-                raise DependencyCollectionError(
-                    f"Jaeger returned HTTP {resp.status} while fetching dependencies"
-                )
-            charset = resp.headers.get_content_charset() or "utf-8"
-            payload = resp.read().decode(charset)
-    except error.URLError as exc:
+        status, resp_headers, payload = _http_get(url, timeout=timeout, headers=headers)
+    except (http.client.HTTPException, OSError) as exc:
         raise DependencyCollectionError(
-            f"Failed to reach Jaeger at '{url}': {exc.reason}"
+            f"Failed to reach Jaeger at '{url}': {exc}"
         ) from exc
+    if status == 304 and "If-None-Match" in headers:
+        payload = body_path.read_bytes()
+    elif 300 <= status < 400:
+        raise DependencyCollectionError(
+            f"Jaeger redirected to '{resp_headers.get('Location')}' (HTTP {status}); "
+            "redirects are not followed, pass the final URL as --jaeger-base-url"
+        )
+    elif status != 200:
+        raise DependencyCollectionError(
+            f"Jaeger returned HTTP {status} while fetching dependencies"
+        )
 
     try:
-        return json.loads(payload)
+        if orjson is not None:
+            data = orjson.loads(payload)
+        else:
+            data = json.loads(payload)
     except json.JSONDecodeError as exc:
         raise DependencyCollectionError(
             "Received an invalid JSON document from Jaeger"
         ) from exc
 
+    etag = resp_headers.get("ETag")
+    if status == 200 and etag and body_path is not None:
+        # Drop the old tag first so it can never be paired with a new body.
+        etag_path.unlink(missing_ok=True)
+        _write_atomic(body_path, payload)
+        _write_atomic(etag_path, etag.encode())
+    return data
+
 
 def save_dependencies(data: Dict[str, Any], path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2, sort_keys=True))
+    if orjson is not None:
+        raw = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    else:
+        raw = json.dumps(data, indent=2, sort_keys=True).encode("utf-8")
+    path.write_bytes(raw)
 
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -196,6 +327,17 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         default=DEFAULT_OUTPUT,
         help="Where to store the captured dependency graph (default: %(default)s)",
     )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help="Directory for ETag-revalidated Jaeger responses (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always download the full dependency graph from Jaeger",
+    )
     parser.add_argument(
         "--skip-workload",
         action="store_true",
@@ -240,6 +382,7 @@ def main(argv: list[str] | None = None) -> int:
         jaeger_base=args.jaeger_base_url,
         lookback_ms=args.lookback,
         timeout=args.timeout,
+        cache_dir=None if args.no_cache else args.cache_dir,
     )
     save_dependencies(deps, args.output)
     print(f"[dependency_collect] Saved dependency graph to {args.output}")
@@ -3,10 +3,23 @@
 from __future__ import annotations
 
 import argparse
-import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import jsonio
+
+
+def _read_json(path: Path) -> Any:
+    return jsonio.loads(path.read_bytes())
+
+
+@lru_cache(maxsize=128)
+def _parse_pfail(value: Any) -> float:
+    # A run matrix repeats a handful of pfail values across many files.
+    return float(value)
 
 
 class GateResult:
@@ -15,32 +28,39 @@ class GateResult:
         self.reason = reason
         self.scores = scores
 
+    def scores_payload(self) -> Dict[str, List[Dict[str, float]]]:
+        """Per-endpoint scores in their serialized form, sorted by pfail."""
+        return {
+            endpoint: [
+                {"pfail": pfail, "reliability": reliability}
+                for pfail, reliability in sorted(entries, key=lambda pair: pair[0])
+            ]
+            for endpoint, entries in self.scores.items()
+        }
+
     def as_dict(self) -> Dict[str, object]:
         return {
             "passed": self.passed,
             "reason": self.reason,
-            "scores": {
-                endpoint: [
-                    {"pfail": pfail, "reliability": reliability}
-                    for pfail, reliability in entries
-                ]
-                for endpoint, entries in self.scores.items()
-            },
+            "scores": self.scores_payload(),
         }
 
 
 def _load_results(directory: Path) -> Dict[Tuple[float, str], Mapping[str, object]]:
     payloads: Dict[Tuple[float, str], Mapping[str, object]] = {}
-    for path in sorted(directory.glob("*.json")):
-        with path.open("r", encoding="utf-8") as fh:
-            data = json.load(fh)
+    paths = jsonio.json_paths(directory)
+    # Overlap the file reads; filtering stays on this thread so that the
+    # last file wins for duplicate (pfail, mode) keys exactly as before.
+    with ThreadPoolExecutor(max_workers=min(jsonio.MAX_READ_WORKERS, len(paths) or 1)) as pool:
+        documents = list(pool.map(_read_json, paths))
+    for path, data in zip(paths, documents):
         summary = data.get("summary")
         if not isinstance(summary, dict) or "pfail" not in summary:
             continue
-        pfail = float(summary.get("pfail"))
+        pfail = _parse_pfail(summary.get("pfail"))
         mode = summary.get("mode")
         if not mode:
-            mode = Path(summary.get("replicas_file", "")).stem or path.stem
+            mode = jsonio.stem(summary.get("replicas_file", "")) or path.stem
         payloads[(pfail, mode)] = data
     return payloads
 
@@ -65,6 +85,19 @@ def _select_endpoints(
     return selected
 
 
+def _worst_entry(entries: List[Tuple[float, float]]) -> Tuple[float, float]:
+    """Return the lowest-reliability ``(pfail, reliability)`` pair in one pass.
+
+    Ties go to the lowest pfail, matching a sort by pfail followed by ``min``.
+    """
+
+    worst = entries[0]
+    for entry in entries:
+        if entry[1] < worst[1] or (entry[1] == worst[1] and entry[0] < worst[0]):
+            worst = entry
+    return worst
+
+
 def evaluate_gate(
     results_dir: Path,
     threshold: float,
@@ -76,23 +109,33 @@ def evaluate_gate(
     if not scores:
         return GateResult(True, "No endpoints matched the filters; gate skipped", scores)
 
+    if mode != "mean":
+        # Default behaviour is "any": fail fast on the first endpoint below the
+        # threshold instead of scoring the remaining endpoints.
+        global_min = float("inf")
+        for endpoint, entries in scores.items():
+            pfail, score = _worst_entry(entries)
+            if score < threshold:
+                reason = (
+                    f"Violations: {endpoint} @ pfail={pfail:g} -> {score:.4f}; "
+                    f"stopped at the first violation (threshold={threshold})"
+                )
+                return GateResult(False, reason, scores)
+            if score < global_min:
+                global_min = score
+        return GateResult(True, f"min reliability={global_min:.4f} (threshold={threshold})", scores)
+
     violations: Dict[str, Tuple[float, float]] = {}
-    aggregate_values: List[float] = []
+    total = 0.0
     for endpoint, entries in scores.items():
-        entries.sort(key=lambda pair: pair[0])
-        endpoint_min = min(reliability for _, reliability in entries)
-        aggregate_values.append(endpoint_min)
-        if endpoint_min < threshold:
-            violations[endpoint] = min(entries, key=lambda pair: pair[1])
-
-    if mode == "mean":
-        aggregate = sum(aggregate_values) / len(aggregate_values)
-        passed = aggregate >= threshold
-        reason = f"mean reliability={aggregate:.4f} (threshold={threshold})"
-    else:
-        # Default behaviour is "any": fail fast if any endpoint is below the threshold.
-        passed = not violations
-        reason = f"min reliability={min(aggregate_values):.4f} (threshold={threshold})"
+        worst = _worst_entry(entries)
+        total += worst[1]
+        if worst[1] < threshold:
+            violations[endpoint] = worst
+
+    aggregate = total / len(scores)
+    passed = aggregate >= threshold
+    reason = f"mean reliability={aggregate:.4f} (threshold={threshold})"
 
     if violations:
         formatted = ", ".join(
@@ -125,11 +168,11 @@ def main(argv: Optional[List[str]] = None) -> int:
         "filters": filters,
         "passed": result.passed,
         "reason": result.reason,
-        "endpoints": result.as_dict()["scores"],
+        "endpoints": result.scores_payload(),
     }
     if args.summary:
         args.summary.parent.mkdir(parents=True, exist_ok=True)
-        args.summary.write_text(json.dumps(summary_payload, indent=2, sort_keys=True) + "\n")
+        jsonio.dump(summary_payload, args.summary)
 
     print(result.reason)
     return 0 if result.passed else 1
@@ -0,0 +1,91 @@
+"""JSON and results-directory helpers shared by the resilience demo scripts.
+
+orjson is used when it is installed; otherwise the standard library ``json``
+module produces the same documents. Both paths work on UTF-8 bytes so callers
+can skip decoding file contents and HTTP bodies to ``str``.
+
+``NaN``/``Infinity`` are not JSON: both paths refuse them on input, and the
+stdlib path refuses them on output too (orjson would write ``null`` instead),
+so callers must keep non-finite floats out of their documents.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, List
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional accelerator
+    orjson = None
+
+
+# Upper bound on concurrent reads when loading a results directory.
+MAX_READ_WORKERS = 16
+
+
+def _reject_constant(name: str) -> Any:
+    raise ValueError(f"Out of range float value {name!r} is not valid JSON")
+
+
+def loads(raw: bytes) -> Any:
+    """Parse a UTF-8 JSON document; malformed input raises ``ValueError``."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw, parse_constant=_reject_constant)
+
+
+def dumps(data: Any) -> bytes:
+    """Serialize ``data`` as indented, key-sorted UTF-8 JSON plus a newline."""
+    if orjson is not None:
+        return orjson.dumps(
+            data,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE,
+        )
+    return (json.dumps(data, indent=2, sort_keys=True, allow_nan=False) + "\n").encode("utf-8")
+
+
+def dumps_line(data: Any) -> bytes:
+    """Serialize ``data`` as compact single-line UTF-8 JSON plus a newline."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(data, separators=(",", ":"), allow_nan=False) + "\n").encode("utf-8")
+
+
+def dump(data: Any, path: Path) -> None:
+    """Write ``data`` to ``path`` in the :func:`dumps` format.
+
+    The stdlib fallback streams the encoder's chunks to the file instead of
+    building the whole document as one ``str`` first.
+    """
+    if orjson is not None:
+        with path.open("wb") as fh:
+            fh.write(dumps(data))
+        return
+    with path.open("w", encoding="utf-8", newline="\n") as fh:
+        json.dump(data, fh, indent=2, sort_keys=True, allow_nan=False)
+        fh.write("\n")
+
+
+def json_paths(directory: Path) -> List[Path]:
+    """Return the ``*.json`` files in ``directory`` sorted by name."""
+
+    try:
+        with os.scandir(directory) as entries:
+            names = sorted(entry.name for entry in entries if entry.name.endswith(".json"))
+    except (FileNotFoundError, NotADirectoryError):
+        # Mirror Path.glob(), which yields nothing for a missing directory.
+        return []
+    return [directory / name for name in names]
+
+
+def stem(path: str) -> str:
+    """Return ``Path(path).stem`` using plain string operations."""
+
+    name = path[path.rfind("/") + 1:]
+    if not name or name == "." or name == "..":
+        # Trailing separators and dot components need pathlib's normalization.
+        return Path(path).stem
+    dot = name.rfind(".")
+    return name[:dot] if 0 < dot < len(name) - 1 else name
@@ -4,25 +4,76 @@ from __future__ import annotations
 
 import argparse
 import html
-import json
+import string
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping, Optional
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
+import jsonio
 
-def _load_results(results_dir: Path) -> List[Mapping[str, object]]:
-    data: List[Mapping[str, object]] = []
-    for path in sorted(results_dir.glob("*.json")):
-        with path.open("r", encoding="utf-8") as fh:
-            data.append(json.load(fh))
-    return data
+
+def _read_result(path: Path) -> Any:
+    """Parse one simulation output, keeping only what the report renders.
+
+    Per-endpoint service lists and reliability breakdowns are dropped right
+    after parsing so the loaded results stay small for large matrices.
+    """
+
+    data = jsonio.loads(path.read_bytes())
+    if not isinstance(data, dict):
+        return data
+    endpoints = data.get("endpoints")
+    if isinstance(endpoints, dict):
+        endpoints = {
+            endpoint: {"reliability": details.get("reliability", 0.0)}
+            for endpoint, details in endpoints.items()
+            if isinstance(details, Mapping)
+        }
+    return {"summary": data.get("summary"), "endpoints": endpoints}
+
+
+def _iter_results(results_dir: Path) -> Iterator[Mapping[str, object]]:
+    """Yield parsed results in file-name order as the worker threads finish them.
+
+    At most ``MAX_READ_WORKERS`` reads are submitted ahead of the caller,
+    which folds each document into the table as it arrives, so parsed
+    documents waiting to be consumed never outnumber that window.
+    """
+
+    paths = jsonio.json_paths(results_dir)
+    window = min(jsonio.MAX_READ_WORKERS, len(paths) or 1)
+    with ThreadPoolExecutor(max_workers=window) as pool:
+        pending: Deque[Future] = deque()
+        for path in paths:
+            if len(pending) == window:
+                yield pending.popleft().result()
+            pending.append(pool.submit(_read_result, path))
+        while pending:
+            yield pending.popleft().result()
+
+
+@lru_cache(maxsize=None)
+def _escape(text: str) -> str:
+    # Endpoint names, pfail labels and filters repeat across renders.
+    return html.escape(text)
 
 
 def _format_percentage(value: float) -> str:
-    return f"{value * 100:.2f}%"
+    # The "%" presentation type scales by 100 inside the formatter itself.
+    return f"{value:.2%}"
+
+
+# One (norepl, repl) reliability pair per pfail column, in column order.
+EndpointRow = List[Tuple[Optional[float], Optional[float]]]
 
 
-def _build_endpoint_rows(results: List[Mapping[str, object]]) -> Dict[str, Dict[str, Dict[str, float]]]:
-    table: Dict[str, Dict[str, Dict[str, float]]] = {}
+def _build_endpoint_rows(results: Iterable[Mapping[str, object]]) -> Tuple[List[str], Dict[str, EndpointRow]]:
+    records: List[Tuple[str, str, bool, float]] = []
+    # Hot-loop names bound as locals to skip repeated global lookups.
+    append = records.append
+    to_float = float
     for payload in results:
         summary = payload.get("summary")
         endpoints = payload.get("endpoints")
@@ -32,128 +83,142 @@ def _build_endpoint_rows(results: List[Mapping[str, object]]) -> Dict[str, Dict[
             continue
 
         pfail = str(summary.get("pfail"))
-        mode = summary.get("mode") or Path(summary.get("replicas_file", "")).stem or "unknown"
-        mode_key = "repl" if mode == "repl" else "norepl"
+        mode = summary.get("mode") or jsonio.stem(summary.get("replicas_file", "")) or "unknown"
+        is_repl = mode == "repl"
         for endpoint, details in endpoints.items():
             if not isinstance(details, Mapping):
                 continue
-            table.setdefault(endpoint, {}).setdefault(pfail, {})[mode_key] = float(details.get("reliability", 0.0))
-    return table
-
-
-def _collect_pfails(table: Mapping[str, Mapping[str, Dict[str, float]]]) -> List[str]:
-    pfails = set()
-    for endpoint_data in table.values():
-        pfails.update(endpoint_data.keys())
-    return sorted(pfails, key=lambda v: float(v))
-
-
-def _render_table(table: Mapping[str, Mapping[str, Dict[str, float]]]) -> str:
-    pfails = _collect_pfails(table)
-    header = "".join(
-        f"<th colspan='2'>pfail={html.escape(p)}</th>" for p in pfails
-    )
-    rows: List[str] = [
-        "<table>",
-        "  <thead>",
-        "    <tr><th rowspan='2'>Endpoint</th>" + header + "</tr>",
-        "    <tr>" + "".join("<th>norepl</th><th>repl</th>" for _ in pfails) + "</tr>",
-        "  </thead>",
-        "  <tbody>",
+            try:
+                reliability = details["reliability"]
+            except KeyError:
+                reliability = 0.0
+            append((endpoint, pfail, is_repl, to_float(reliability)))
+
+    pfails = _collect_pfails(pfail for _, pfail, _, _ in records)
+    pfail_index = {p: i for i, p in enumerate(pfails)}
+    empty: Tuple[Optional[float], Optional[float]] = (None, None)
+    table: Dict[str, EndpointRow] = {}
+    for endpoint, pfail, is_repl, reliability in records:
+        row = table.get(endpoint)
+        if row is None:
+            row = table[endpoint] = [empty] * len(pfails)
+        i = pfail_index[pfail]
+        norepl, repl = row[i]
+        row[i] = (norepl, reliability) if is_repl else (reliability, repl)
+    return pfails, table
+
+
+def _collect_pfails(pfails: Iterable[str]) -> List[str]:
+    return sorted(set(pfails), key=lambda v: float(v))
+
+
+def _iter_table_chunks(pfails: List[str], table: Mapping[str, EndpointRow]) -> Iterator[str]:
+    """Yield the table markup: the header first, then one chunk per row."""
+
+    parts: List[str] = [
+        "<table>\n  <thead>\n    <tr><th rowspan='2'>Endpoint</th>",
     ]
-
+    parts.extend(f"<th colspan='2'>pfail={_escape(p)}</th>" for p in pfails)
+    parts.append("</tr>\n    <tr>")
+    parts.extend("<th>norepl</th><th>repl</th>" for _ in pfails)
+    parts.append("</tr>\n  </thead>\n  <tbody>")
+    yield "".join(parts)
+
+    escape = _escape
+    fmt = _format_percentage
     for endpoint in sorted(table.keys()):
-        row_cells = [f"    <tr><td>{html.escape(endpoint)}</td>"]
-        for pfail in pfails:
-            data = table[endpoint].get(pfail, {})
-            norepl = data.get("norepl")
-            repl = data.get("repl")
-            row_cells.append(
-                f"<td class='norepl'>{_format_percentage(norepl) if norepl is not None else '–'}</td>"
-            )
-            row_cells.append(
-                f"<td class='repl'>{_format_percentage(repl) if repl is not None else '–'}</td>"
+        parts = [f"\n    <tr><td>{escape(endpoint)}</td>"]
+        append = parts.append
+        for norepl, repl in table[endpoint]:
+            append(
+                f"<td class='norepl'>{fmt(norepl) if norepl is not None else '–'}</td>"
+                f"<td class='repl'>{fmt(repl) if repl is not None else '–'}</td>"
             )
-        row_cells.append("</tr>")
-        rows.append("".join(row_cells))
+        append("</tr>")
+        yield "".join(parts)
 
-    rows.append("  </tbody>")
-    rows.append("</table>")
-    return "\n".join(rows)
+    yield "\n  </tbody>\n</table>"
 
 
 def _render_summary(summary_path: Optional[Path]) -> str:
     if not summary_path or not summary_path.exists():
         return "<p>No gate summary was generated.</p>"
-    summary = json.loads(summary_path.read_text())
+    summary = jsonio.loads(summary_path.read_bytes())
     status = "passed" if summary.get("passed") else "failed"
-    reason = html.escape(summary.get("reason", ""))
+    reason = _escape(summary.get("reason", ""))
     filters = summary.get("filters", [])
     if filters:
-        filter_html = ", ".join(html.escape(flt) for flt in filters)
+        filter_html = ", ".join(_escape(flt) for flt in filters)
     else:
         filter_html = "(all endpoints)"
     return (
         "<section class='gate-summary'>"
         f"<h2>Gate status: <span class='{status}'>{status.upper()}</span></h2>"
         f"<p>{reason}</p>"
-        f"<p>Threshold: {summary.get('threshold')} — Mode: {html.escape(summary.get('mode', 'any'))}</p>"
+        f"<p>Threshold: {summary.get('threshold')} — Mode: {_escape(summary.get('mode', 'any'))}</p>"
         f"<p>Filters: {filter_html}</p>"
         "</section>"
     )
 
 
-def render_html(
-    results_dir: Path,
-    summary_path: Optional[Path],
-    output_path: Path,
-    title: str = "Social Network resilience demo",
-) -> None:
-    results = _load_results(results_dir)
-    table = _build_endpoint_rows(results)
-    table_markup = _render_table(table)
-    summary_markup = _render_summary(summary_path)
-
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(
-        """<!DOCTYPE html>
+# string.Template placeholders leave the CSS braces literal, so no escaping is needed.
+_HTML_HEAD = string.Template("""<!DOCTYPE html>
 <html lang="en">
   <head>
     <meta charset="utf-8">
-    <title>{title}</title>
+    <title>${title}</title>
     <style>
-      body {{ font-family: system-ui, sans-serif; margin: 2rem; color: #111; background: #fafafa; }}
-      h1 {{ margin-top: 0; }}
-      table {{ border-collapse: collapse; width: 100%; margin-top: 1.5rem; }}
-      th, td {{ border: 1px solid #ccc; padding: 0.5rem; text-align: center; }}
-      thead th {{ background: #f0f0f0; }}
-      td.norepl {{ background: #ffe7d6; }}
-      td.repl {{ background: #e0f7ec; }}
-      .gate-summary {{ padding: 1rem; border-left: 4px solid #888; background: #fff; }}
-      .gate-summary .passed {{ color: #0a7d25; }}
-      .gate-summary .failed {{ color: #c2272d; }}
-      footer {{ margin-top: 2rem; font-size: 0.85rem; color: #555; }}
-      code {{ background: rgba(0,0,0,0.05); padding: 0.2rem 0.3rem; border-radius: 4px; }}
+      body { font-family: system-ui, sans-serif; margin: 2rem; color: #111; background: #fafafa; }
+      h1 { margin-top: 0; }
+      table { border-collapse: collapse; width: 100%; margin-top: 1.5rem; }
+      th, td { border: 1px solid #ccc; padding: 0.5rem; text-align: center; }
+      thead th { background: #f0f0f0; }
+      td.norepl { background: #ffe7d6; }
+      td.repl { background: #e0f7ec; }
+      .gate-summary { padding: 1rem; border-left: 4px solid #888; background: #fff; }
+      .gate-summary .passed { color: #0a7d25; }
+      .gate-summary .failed { color: #c2272d; }
+      footer { margin-top: 2rem; font-size: 0.85rem; color: #555; }
+      code { background: rgba(0,0,0,0.05); padding: 0.2rem 0.3rem; border-radius: 4px; }
     </style>
   </head>
   <body>
-    <h1>{title}</h1>
-    {summary_markup}
+    <h1>${title}</h1>
+    ${summary_markup}
     <section>
       <h2>Endpoint reliability</h2>
-      {table_markup}
+      """)
+
+_HTML_TAIL = """
     </section>
     <footer>
       Generated from offline artifacts under <code>socialNetwork/resilience-demo/</code>.
     </footer>
   </body>
 </html>
-""".format(
-            title=html.escape(title),
-            summary_markup=summary_markup,
-            table_markup=table_markup,
-        )
-    )
+"""
+
+# Large enough that a typical report reaches disk in a handful of writes.
+_WRITE_BUFFER_SIZE = 1 << 20
+
+
+def render_html(
+    results_dir: Path,
+    summary_path: Optional[Path],
+    output_path: Path,
+    title: str = "Social Network resilience demo",
+) -> None:
+    pfails, table = _build_endpoint_rows(_iter_results(results_dir))
+    summary_markup = _render_summary(summary_path)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # Stream the table row by row so the full document never has to be
+    # held in memory as one string.
+    with output_path.open("w", encoding="utf-8", buffering=_WRITE_BUFFER_SIZE) as fh:
+        fh.write(_HTML_HEAD.substitute(title=html.escape(title), summary_markup=summary_markup))
+        for chunk in _iter_table_chunks(pfails, table):
+            fh.write(chunk)
+        fh.write(_HTML_TAIL)
 
 
 def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
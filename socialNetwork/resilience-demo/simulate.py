@@ -4,6 +4,10 @@
 The CLI follows the SIM_CLI_CONTRACT:
     --graph <deps.json> --replicas <yaml> --pfail <float> --out <json>
 
+With ``--serve`` the same four values are read as JSON objects
+(``{"graph", "replicas", "pfail", "out"}``), one per stdin line, and each run
+is acknowledged with a JSON line on stdout.
+
 The simulator consumes a Jaeger-style dependencies graph and replica counts to
 produce endpoint level reliability estimates. The implementation intentionally
 keeps the model lightweight so it can execute quickly inside CI while still
@@ -13,19 +17,36 @@ endpoint.
 from __future__ import annotations
 
 import argparse
-import json
+import contextlib
+import email.utils
+import gzip
+import math
 import os
+import re
 import sys
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
+import zlib
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping, MutableMapping, Optional
+from typing import BinaryIO, Dict, Iterable, List, Mapping, MutableMapping, Optional
+
+import jsonio
 
 ARTIFACT_ROOT = Path(__file__).resolve().parent
 
 
+# A well-formed "key: <int>" entry with an optional trailing comment.
+_YAML_ENTRY = re.compile(
+    rb"(?m)^[ \t]*([^#:\s](?:[^#:\n]*[^#:\s])?)[ \t]*:[ \t]*(-?\d+)[ \t]*(?:#.*)?$"
+)
+# Any line that still has content once comments and whitespace are removed.
+_YAML_CONTENT_LINE = re.compile(rb"(?m)^[ \t]*[^#\s]")
+# Bytes the regexes do not model (CR and other line breaks, non-ASCII text).
+_YAML_UNUSUAL_BYTE = re.compile(rb"[^\t\n\x20-\x7e]")
+
+
 def _load_simple_yaml(path: Path) -> Dict[str, int]:
     """Load a simple key: value mapping from a tiny YAML subset.
 
@@ -33,8 +54,19 @@ def _load_simple_yaml(path: Path) -> Dict[str, int]:
     avoid bringing an additional YAML dependency into the environment.
     """
 
+    buf = path.read_bytes()
+    if not _YAML_UNUSUAL_BYTE.search(buf):
+        entries = _YAML_ENTRY.findall(buf)
+        if len(entries) == len(_YAML_CONTENT_LINE.findall(buf)):
+            return {sys.intern(key.decode("ascii")): int(value) for key, value in entries}
+    # Anything beyond plain ASCII entries goes through the line parser, which
+    # also produces the error messages for malformed lines.
+    return _parse_simple_yaml_lines(path, buf.decode("utf-8"))
+
+
+def _parse_simple_yaml_lines(path: Path, text: str) -> Dict[str, int]:
     data: Dict[str, int] = {}
-    for raw_line in path.read_text().splitlines():
+    for raw_line in text.splitlines():
         line = raw_line.split("#", 1)[0].strip()
         if not line:
             continue
@@ -46,45 +78,80 @@ def _load_simple_yaml(path: Path) -> Dict[str, int]:
         if not value:
             raise ValueError(f"Missing value for {key!r} in {path}")
         try:
-            data[key] = int(value)
+            data[sys.intern(key)] = int(value)
         except ValueError as exc:  # pragma: no cover - defensive path
             raise ValueError(f"Non-integer replica count for {key!r}") from exc
     return data
 
 
-def _fetch_graph_from_jaeger(target: Path, url: str) -> None:
-    """Refresh the dependency graph from a Jaeger dependencies API."""
+def _fetch_graph_from_jaeger(target: Path, url: str) -> Optional[object]:
+    """Refresh the dependency graph from a Jaeger dependencies API.
+
+    Returns the parsed graph when the response was valid JSON, so the caller
+    does not parse the saved file a second time, and ``None`` when the saved
+    graph was kept (HTTP 304 or a failed refresh).
+    """
 
     query = urllib.parse.urljoin(url.rstrip("/") + "/", "api/dependencies")
     # The demo does not expose time range knobs; 6 hours is a sensible default
     # that returns a stable snapshot in most deployments.
     params = urllib.parse.urlencode({"lookback": 6 * 60 * 60})
-    req = urllib.request.Request(f"{query}?{params}")
+    # Dependency dumps are highly repetitive, so ask for a gzip-compressed body.
+    req = urllib.request.Request(
+        f"{query}?{params}",
+        headers={"Accept": "application/json", "Accept-Encoding": "gzip"},
+    )
+    if target.exists():
+        # Let Jaeger answer 304 when nothing changed since the last refresh.
+        req.add_header(
+            "If-Modified-Since",
+            email.utils.formatdate(target.stat().st_mtime, usegmt=True),
+        )
     try:
         with urllib.request.urlopen(req, timeout=10) as resp:
-            payload = resp.read().decode("utf-8")
+            payload = resp.read()
+            content_encoding = resp.headers.get("Content-Encoding", "")
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            print(f"[simulate] Dependencies graph is up to date with {query}")
+            return None
+        print(
+            f"[simulate] Warning: failed to refresh dependencies from {query}: {exc}",
+            file=sys.stderr,
+        )
+        return None
     except (urllib.error.URLError, TimeoutError) as exc:
         print(
             f"[simulate] Warning: failed to refresh dependencies from {query}: {exc}",
             file=sys.stderr,
         )
-        return
+        return None
 
     try:
-        json.loads(payload)
-    except json.JSONDecodeError:
+        if content_encoding.strip().lower() == "gzip":
+            payload = gzip.decompress(payload)
+        data = jsonio.loads(payload)
+    except (ValueError, OSError, EOFError, zlib.error):
         print(
             "[simulate] Warning: Jaeger response was not valid JSON; keeping the saved graph.",
             file=sys.stderr,
         )
-        return
+        return None
 
-    target.write_text(payload + "\n")
+    payload += b"\n"
+    if target.exists() and target.read_bytes() == payload:
+        print(f"[simulate] Dependencies graph is up to date with {query}")
+        return data
+    target.write_bytes(payload)
     print(f"[simulate] Dependencies graph refreshed from {query}")
+    return data
 
 
 def _load_graph(path: Path) -> Mapping[str, object]:
-    data = json.loads(path.read_text())
+    return _graph_from_data(jsonio.loads(path.read_bytes()))
+
+
+def _graph_from_data(data: object) -> Mapping[str, object]:
     if isinstance(data, list):
         dependencies = data
         entrypoints: Mapping[str, List[str]] = {}
@@ -102,87 +169,93 @@ def _load_graph(path: Path) -> Mapping[str, object]:
     }
 
 
-def _derive_entrypoints(dependencies: Iterable[Mapping[str, str]]) -> Dict[str, List[str]]:
-    """Fallback entrypoints when the graph does not provide them explicitly."""
-    # The fallback chooses every unique parent as a pseudo-endpoint so the demo
-    # continues to operate even if a minimal Jaeger dump is provided.
-    entrypoints: Dict[str, List[str]] = {}
-    for dep in dependencies:
-        parent = dep.get("parent")
-        child = dep.get("child")
-        if not parent or not child:
-            continue
-        endpoint_key = f"/{parent}"
-        entrypoints.setdefault(endpoint_key, [])
-        if parent not in entrypoints[endpoint_key]:
-            entrypoints[endpoint_key].append(parent)
-        if child not in entrypoints[endpoint_key]:
-            entrypoints[endpoint_key].append(child)
-    return entrypoints
+def _intern(name: object) -> object:
+    # Service names repeat across edges, entrypoints and replica counts;
+    # interned copies share one object, so dict lookups hit on identity.
+    return sys.intern(name) if isinstance(name, str) else name
 
 
 def _service_reliability(pfail: float, replicas: int) -> float:
     replicas = max(1, replicas)
     pf = max(0.0, min(1.0, pfail))
     # Independent replicas lower the joint failure probability geometrically.
+    # With pf in [0, 1] the result is already in [0, 1]; no second clamp.
     joint_failure = pf ** replicas
-    return max(0.0, min(1.0, 1.0 - joint_failure))
-
-
-def _path_reliability(path_services: Iterable[str], reliabilities: Mapping[str, float]) -> float:
-    score = 1.0
-    seen: set[str] = set()
-    for service in path_services:
-        if service in seen:
-            continue
-        seen.add(service)
-        score *= reliabilities.get(service, 1.0)
-    return max(0.0, min(1.0, score))
+    return 1.0 - joint_failure
 
 
 def run_simulation(graph_path: Path, replicas_path: Path, pfail: float, out_path: Path) -> Mapping[str, object]:
-    if pfail < 0:
-        raise ValueError("pfail must be >= 0")
+    if not math.isfinite(pfail) or pfail < 0:
+        raise ValueError("pfail must be a finite number >= 0")
 
     jaeger_url = os.environ.get("JAEGER_URL")
-    if jaeger_url:
-        _fetch_graph_from_jaeger(graph_path, jaeger_url)
+    fetched = _fetch_graph_from_jaeger(graph_path, jaeger_url) if jaeger_url else None
 
-    graph_payload = _load_graph(graph_path)
+    if fetched is not None:
+        graph_payload = _graph_from_data(fetched)
+    else:
+        graph_payload = _load_graph(graph_path)
     dependencies = graph_payload["dependencies"]
     entrypoints: Dict[str, List[str]] = dict(graph_payload["entrypoints"])  # shallow copy
-    if not entrypoints:
-        entrypoints = _derive_entrypoints(dependencies)
-
-    replicas = _load_simple_yaml(replicas_path)
-
-    service_reliability: Dict[str, float] = {}
+    # Without explicit entrypoints, every unique parent becomes a
+    # pseudo-endpoint so the demo still works on a minimal Jaeger dump.
+    derive_entrypoints = not entrypoints
+    # Set sidecar for O(1) membership checks; the lists keep output order.
+    entrypoint_members: Dict[str, set[str]] = {}
+
+    # One pass over the dependencies collects every service (dict keys double
+    # as an ordered set) and, when needed, the fallback entrypoints.
+    services_seen: Dict[str, None] = {}
     for dep in dependencies:
-        parent = dep.get("parent")
-        child = dep.get("child")
+        parent = _intern(dep.get("parent"))
+        child = _intern(dep.get("child"))
         if parent:
-            service_reliability.setdefault(
-                parent,
-                _service_reliability(pfail, replicas.get(parent, 1)),
-            )
+            services_seen[parent] = None
         if child:
-            service_reliability.setdefault(
-                child,
-                _service_reliability(pfail, replicas.get(child, 1)),
-            )
+            services_seen[child] = None
+        if derive_entrypoints and parent and child:
+            endpoint_key = sys.intern(f"/{parent}")
+            members = entrypoint_members.setdefault(endpoint_key, set())
+            path_services = entrypoints.setdefault(endpoint_key, [])
+            for service in (parent, child):
+                if service not in members:
+                    members.add(service)
+                    path_services.append(service)
 
-    # Include services that never appear in the dependency list.
-    for service, count in replicas.items():
-        service_reliability.setdefault(service, _service_reliability(pfail, count))
+    replicas = _load_simple_yaml(replicas_path)
+    # Services that never appear in the dependency list are included too.
+    services_seen.update(dict.fromkeys(replicas))
+
+    # Services share a handful of replica counts, so evaluate the failure
+    # model once per distinct count and look the result up per service.
+    counts = {service: replicas.get(service, 1) for service in services_seen}
+    by_count = {count: _service_reliability(pfail, count) for count in set(counts.values())}
+    service_reliability: Dict[str, float] = {
+        service: by_count[count] for service, count in counts.items()
+    }
 
     endpoint_results: Dict[str, Dict[str, object]] = {}
-    for endpoint, services in sorted(entrypoints.items()):
-        reliability = _path_reliability(services, service_reliability)
+    reliability_of = service_reliability.get
+    # Track the summary extremes while building the results instead of
+    # scanning endpoint_results twice afterwards.
+    min_reliability = max_reliability = None
+    for endpoint in sorted(entrypoints):
+        services = entrypoints[endpoint]
+        # One lookup per service feeds both the per-service breakdown and the
+        # path product; the dict keys also drop services repeated on a path.
+        path_reliability = {svc: reliability_of(svc, 1.0) for svc in services}
+        # A product of values in [0, 1] stays in [0, 1]; the float start keeps
+        # an empty path at 1.0 rather than the integer 1.
+        reliability = math.prod(path_reliability.values(), start=1.0)
         endpoint_results[endpoint] = {
             "services": services,
             "reliability": reliability,
-            "service_reliability": {svc: service_reliability.get(svc, 1.0) for svc in services},
+            "service_reliability": path_reliability,
         }
+        if min_reliability is None or reliability < min_reliability:
+            min_reliability = reliability
+        if max_reliability is None or reliability > max_reliability:
+            max_reliability = reliability
 
     mode = "norepl" if replicas_path.stem.lower().startswith("norepl") else "repl"
 
@@ -190,8 +263,8 @@ def run_simulation(graph_path: Path, replicas_path: Path, pfail: float, out_path
         "pfail": pfail,
         "replicas_file": str(replicas_path),
         "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-        "min_reliability": min((ep["reliability"] for ep in endpoint_results.values()), default=1.0),
-        "max_reliability": max((ep["reliability"] for ep in endpoint_results.values()), default=1.0),
+        "min_reliability": 1.0 if min_reliability is None else min_reliability,
+        "max_reliability": 1.0 if max_reliability is None else max_reliability,
         "entrypoint_count": len(endpoint_results),
         "mode": mode,
     }
@@ -204,21 +277,67 @@ def run_simulation(graph_path: Path, replicas_path: Path, pfail: float, out_path
     }
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n")
+    jsonio.dump(payload, out_path)
     return payload
 
 
 def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run the offline resilience simulator")
-    parser.add_argument("--graph", required=True, type=Path, help="Path to the Jaeger dependencies dump")
-    parser.add_argument("--replicas", required=True, type=Path, help="YAML file describing replica counts")
-    parser.add_argument("--pfail", required=True, type=float, help="Failure probability prior")
-    parser.add_argument("--out", required=True, type=Path, help="Write the JSON report to this file")
-    return parser.parse_args(argv)
+    parser.add_argument("--graph", type=Path, help="Path to the Jaeger dependencies dump")
+    parser.add_argument("--replicas", type=Path, help="YAML file describing replica counts")
+    parser.add_argument("--pfail", type=float, help="Failure probability prior")
+    parser.add_argument("--out", type=Path, help="Write the JSON report to this file")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Read one JSON request per stdin line and answer each on stdout",
+    )
+    args = parser.parse_args(argv)
+    if not args.serve:
+        missing = [
+            f"--{name}" for name in ("graph", "replicas", "pfail", "out") if getattr(args, name) is None
+        ]
+        if missing:
+            parser.error(f"the following arguments are required: {', '.join(missing)}")
+    return args
+
+
+def serve(requests: Iterable[bytes], replies: BinaryIO) -> int:
+    """Run one simulation per JSON request line and write one JSON reply each.
+
+    Progress messages go to stderr so stdout only carries replies. A failed
+    request, whatever it raised, is reported as ``{"ok": false, "error": ...}``
+    and the loop keeps going; only ``KeyboardInterrupt``/``SystemExit`` stop it.
+    The return code is 1 if any request failed.
+    """
+    status = 0
+    for line in requests:
+        if not line.strip():
+            continue
+        out = None
+        try:
+            request = jsonio.loads(line)
+            out = request["out"]
+            with contextlib.redirect_stdout(sys.stderr):
+                run_simulation(
+                    Path(request["graph"]),
+                    Path(request["replicas"]),
+                    float(request["pfail"]),
+                    Path(out),
+                )
+            reply = {"ok": True, "out": out}
+        except Exception as exc:  # one bad request must not drop later replies
+            status = 1
+            reply = {"ok": False, "out": out, "error": f"{type(exc).__name__}: {exc}"}
+        replies.write(jsonio.dumps_line(reply))
+        replies.flush()
+    return status
 
 
 def main(argv: Optional[List[str]] = None) -> int:
     args = parse_args(argv)
+    if args.serve:
+        return serve(sys.stdin.buffer, sys.stdout.buffer)
     run_simulation(args.graph, args.replicas, args.pfail, args.out)
     print(f"[simulate] Results written to {args.out}")
     return 0